@@ -64,6 +64,10 @@ def main():
             "cmd": "python src/ingest.py",
             "desc": "Alias for ingest - build RAG vector database",
         },
+        "onnx": {
+            "cmd": "python src/utils/onnx_embeddings.py",
+            "desc": "Export INT8 ONNX embedding model for RAG queries",
+        },
         "ui": {
             "cmd": "npm run dev",
             "desc": "Start React frontend development server (port 3000)",
@@ -9,12 +9,14 @@ from dotenv import load_dotenv
 import os
 import warnings
 import logging
-from src.utils.model_loader import get_model
+from src.utils.model_loader import init_model
 
 load_dotenv()
 
 # Suppress ALL warnings for cleaner logs
 warnings.filterwarnings("ignore")
+# Route app loggers (heartsight.*) to stderr; their levels are set per module
+logging.basicConfig(format="%(levelname)s [%(name)s] %(message)s")
 logging.getLogger("mlflow").setLevel(logging.CRITICAL)
 logging.getLogger("urllib3").setLevel(logging.CRITICAL)
 logging.getLogger("requests").setLevel(logging.CRITICAL)
@@ -78,7 +80,7 @@ async def startup_event():
         import threading
 
         metrics_thread = threading.Thread(
-            target=lambda: start_prometheus_metrics(port=9000, sleep_interval=None),
+            target=lambda: start_prometheus_metrics(port=9000),
             daemon=True,
         )
         metrics_thread.start()
@@ -146,23 +148,22 @@ async def startup_event():
 
                 model_loader_module._model = None
                 model_loader_module._class_names = None
+                model_loader_module._resolved_uri.clear()
     except Exception as check_error:
         print(f"⚠️  Could not check model registry: {check_error}")
 
     # Try to load the model
     try:
         # Suppress all output during model loading
-        import sys
-        from io import StringIO
+        from src.utils.model_loader import _silent
 
-        old_stdout = sys.stdout
-        sys.stdout = StringIO()
-        try:
-            model, class_names = get_model(raise_on_error=False)
-        finally:
-            sys.stdout = old_stdout
+        with _silent():
+            model, class_names = init_model(raise_on_error=False)
 
         if model is not None:
+            from src.utils.model_loader import warm_up_model
+
+            warm_up_model()
             print(f"✅ Model ready. Classes: {class_names}")
             print("=" * 60)
             print("✅ API Ready! Listening on http://127.0.0.1:8000")
@@ -175,6 +176,16 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️  Model will load on first request: {e}")
 
+    # Build the RAG explainer now so the first explanation does not pay for
+    # Gemini client setup, embedding model load and Chroma cold start
+    try:
+        from src.rag_engine import get_explainer
+
+        get_explainer().warm_up()
+        print("✅ RAG engine warmed up")
+    except Exception as e:
+        print(f"⚠️  RAG engine will load on first request: {e}")
+
 
 @app.get("/", tags=["Root"])
 def read_root():
@@ -4,6 +4,7 @@ Uses the Gemini-powered RAG engine to provide contextual, patient-friendly answe
 """
 
 from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 
@@ -12,12 +13,12 @@ from src.guardrails import apply_guardrails_to_input, apply_guardrails_to_output
 
 try:
     from src.monitoring.prometheus_metrics import (
-        observe_llm_call,
+        record_llm_call,
         record_chat_message,
     )
 except Exception:  # pragma: no cover - metrics optional
 
-    def observe_llm_call(*args, **kwargs):  # type: ignore[no-redef]
+    def record_llm_call(*args, **kwargs):  # type: ignore[no-redef]
         return None
 
     def record_chat_message(*args, **kwargs):  # type: ignore[no-redef]
@@ -26,6 +27,26 @@ except Exception:  # pragma: no cover - metrics optional
 
 router = APIRouter()
 
+# Persona and reply rules for follow-up chat; chat_with_rag() slots the patient
+# fields, guideline context and the sanitized question in between
+CHAT_PROMPT_HEAD = """
+You are a helpful, empathetic medical assistant specializing in cardiology.
+You are talking to a patient who recently received an ECG result.
+
+Here is the patient's clinical information:
+"""
+
+CHAT_PROMPT_INSTRUCTIONS = """Instructions for your reply:
+1. Respond in a warm, patient-friendly tone.
+2. Use simple, non-technical language unless necessary.
+3. Provide medically accurate and safe information.
+4. If discussing lifestyle or next steps, keep recommendations general.
+5. Encourage the patient to consult their cardiologist for personalized guidance.
+6. DO NOT give medication doses, treatment plans, or emergencies advice.
+
+Your response:
+"""
+
 
 # -----------------------------------------
 # Request / Response Models
@@ -55,7 +76,7 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/chat", tags=["Chat"])
-def chat_with_rag(request: ChatRequest) -> ChatResponse:
+async def chat_with_rag(request: ChatRequest) -> ChatResponse:
     """
     Chat endpoint for follow-up questions about ECG results.
 
@@ -66,8 +87,8 @@ def chat_with_rag(request: ChatRequest) -> ChatResponse:
     """
 
     try:
-        # Load Gemini RAG explainer
-        explainer = get_explainer()
+        # Load Gemini RAG explainer; the first call constructs it, so use a thread
+        explainer = await run_in_threadpool(get_explainer)
 
         print("\n" + "=" * 60)
         print("💬 NEW CHAT REQUEST")
@@ -88,7 +109,8 @@ def chat_with_rag(request: ChatRequest) -> ChatResponse:
         # Step 1 — Retrieve Relevant Context
         # -----------------------------------------
 
-        context = explainer.retrieve_context(
+        context = await run_in_threadpool(
+            explainer.retrieve_context,
             diagnosis=request.diagnosis,
             age=request.age,
             sex=request.sex,
@@ -101,31 +123,17 @@ def chat_with_rag(request: ChatRequest) -> ChatResponse:
         print(f"   ✅ Retrieved {len(context)} chars of context.")
         print(context[:100] + "\n...")
 
-        prompt = f"""
-You are a helpful, empathetic medical assistant specializing in cardiology.
-You are talking to a patient who recently received an ECG result.
-
-Here is the patient's clinical information:
-- Diagnosis: {request.diagnosis}
-- Age: {request.age if request.age else "Not provided"}
-- Sex: {request.sex if request.sex else "Not provided"}
-
-Relevant Medical Context (extracted from trusted medical guidelines):
-{context}
-
-Patient's Question:
-"{sanitized_message}"
-
-Instructions for your reply:
-1. Respond in a warm, patient-friendly tone.
-2. Use simple, non-technical language unless necessary.
-3. Provide medically accurate and safe information.
-4. If discussing lifestyle or next steps, keep recommendations general.
-5. Encourage the patient to consult their cardiologist for personalized guidance.
-6. DO NOT give medication doses, treatment plans, or emergencies advice.
-
-Your response:
-"""
+        prompt = (
+            f"{CHAT_PROMPT_HEAD}"
+            f"- Diagnosis: {request.diagnosis}\n"
+            f"- Age: {request.age if request.age else 'Not provided'}\n"
+            f"- Sex: {request.sex if request.sex else 'Not provided'}\n\n"
+            "Relevant Medical Context (extracted from trusted medical guidelines):\n"
+            f"{context}\n\n"
+            "Patient's Question:\n"
+            f'"{sanitized_message}"\n\n'
+            f"{CHAT_PROMPT_INSTRUCTIONS}"
+        )
 
         print("   🤖 Calling Gemini 2.5 Flash for chat response...")
 
@@ -136,7 +144,8 @@ Your response:
 
         llm_start = time.time()
         try:
-            response = explainer.llm.generate_content(prompt)
+            # Awaited so other requests are served while Gemini generates
+            response = await explainer.llm.generate_content_async(prompt)
             raw_reply = response.text.strip()
             llm_latency = time.time() - llm_start
 
@@ -149,7 +158,7 @@ Your response:
             )
             reply = output_guardrails.text
 
-            observe_llm_call(
+            record_llm_call(
                 endpoint="chat",
                 latency_seconds=llm_latency,
                 tokens=approx_tokens,
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import numpy as np
 from typing import List, Optional
@@ -34,7 +36,7 @@ class ECGSimpleInput(BaseModel):
 
 
 @router.post("/predict", tags=["Model"])
-def predict_ecg(input_data: ECGSignalInput):
+async def predict_ecg(input_data: ECGSignalInput):
     """
     Predict ECG classification using the MLflow-registered model.
 
@@ -87,7 +89,7 @@ def predict_ecg(input_data: ECGSignalInput):
         # Get prediction from XGBoost model
         print("🤖 Running ML model...")
         model_start = time.time()
-        prediction = predict_ecg_signal(signal_array)
+        prediction = await run_in_threadpool(predict_ecg_signal, signal_array)
         model_time = time.time() - model_start
         predicted_class = prediction["predicted_class"]
         print(
@@ -100,8 +102,10 @@ def predict_ecg(input_data: ECGSignalInput):
         try:
             from src.rag_engine import get_explainer
 
-            explainer = get_explainer()
-            explanation_data = explainer.generate_explanation(
+            # Only the singleton's first construction blocks; agenerate_explanation
+            # awaits Gemini and threads its own retrieval
+            explainer = await run_in_threadpool(get_explainer)
+            explanation_data = await explainer.agenerate_explanation(
                 diagnosis=predicted_class,
                 age=input_data.age,
                 sex=input_data.sex,
@@ -139,7 +143,8 @@ def predict_ecg(input_data: ECGSignalInput):
         # Check for data drift using Evidently
         try:
             drift_monitor = get_drift_monitor()
-            drift_report = drift_monitor.check_drift(
+            drift_report = await run_in_threadpool(
+                drift_monitor.check_drift,
                 current_signals=[input_data.signal],
                 current_predictions=[predicted_class],
                 current_confidences=[prediction["confidence"]],
@@ -189,6 +194,49 @@ def predict_ecg(input_data: ECGSignalInput):
         raise HTTPException(status_code=500, detail=f"Prediction error: {error_detail}")
 
 
+class ExplanationInput(BaseModel):
+    """Input for streaming the RAG explanation of an already predicted class."""
+
+    diagnosis: str  # Predicted class from /predict (e.g. "MI")
+    age: Optional[int] = None
+    sex: Optional[str] = None
+
+
+def _sse_event(text: str) -> str:
+    """Format `text` as one Server-Sent Event (one data field per line)."""
+    return "".join(f"data: {line}\n" for line in text.split("\n")) + "\n"
+
+
+@router.post("/explain/stream", tags=["Model"])
+def stream_explanation(input_data: ExplanationInput):
+    """
+    Stream the RAG explanation for a diagnosis as Server-Sent Events.
+
+    Each event carries one guardrail-checked paragraph as soon as Gemini has
+    produced it; a final `done` event closes the stream.
+    """
+    from src.rag_engine import get_explainer
+
+    def events():
+        try:
+            explainer = get_explainer()
+            for paragraph in explainer.stream_explanation(
+                diagnosis=input_data.diagnosis,
+                age=input_data.age,
+                sex=input_data.sex,
+            ):
+                yield _sse_event(paragraph.strip())
+        except Exception as rag_error:
+            print(f"   ⚠️  RAG streaming failed: {rag_error}")
+            yield _sse_event(
+                f"Your ECG shows {input_data.diagnosis}. Please consult with a cardiologist for detailed interpretation and personalized treatment recommendations."
+            )
+        yield "event: done\ndata: \n\n"
+
+    # Sync generator: Starlette iterates it in a worker thread
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
 @router.post("/predict/simple", tags=["Model"])
 def predict_ecg_simple(input_data: ECGSimpleInput):
     """
@@ -85,6 +85,11 @@ TOXICITY_KEYWORDS = [
     "kill yourself",
 ]
 
+# All keywords in one case-insensitive scan (no per-keyword pass or lower() copy)
+TOXICITY_PATTERN = re.compile(
+    "|".join(re.escape(keyword) for keyword in TOXICITY_KEYWORDS), re.IGNORECASE
+)
+
 
 class GuardrailsEngine:
     """Lightweight policy engine for input validation and output moderation."""
@@ -175,8 +180,7 @@ class GuardrailsEngine:
             self._log_event(event)
 
         # Very lightweight toxicity keyword scan
-        lowered = sanitized.lower()
-        if any(keyword in lowered for keyword in TOXICITY_KEYWORDS):
+        if TOXICITY_PATTERN.search(sanitized):
             before = sanitized
             sanitized = (
                 "I'm sorry, but I cannot respond in that way. "
@@ -3,7 +3,10 @@ Document Ingestion Pipeline for RAG Engine
 Loads PDFs, splits into chunks, embeds, and stores in ChromaDB.
 """
 
+import json
 from pathlib import Path
+
+import numpy as np
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -19,10 +22,15 @@ load_dotenv()
 # Configuration
 DOCS_DIR = Path("data/docs")
 VECTOR_DB_DIR = Path("data/vector_db")
+EXACT_INDEX_DIR = VECTOR_DB_DIR / "exact"  # per-PDF embedding matrices
 CHUNK_SIZE = 500
 CHUNK_OVERLAP = 50
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+# Cosine ranks identically to L2 on the normalized MiniLM embeddings; M and
+# search_ef keep Chroma's defaults
+HNSW_METADATA = {"hnsw:space": "cosine"}
+
 
 def load_pdfs(docs_dir: Path):
     """Load all PDF files from the docs directory."""
@@ -61,6 +69,12 @@ def split_documents(documents, chunk_size=500, chunk_overlap=50):
     )
 
     chunks = text_splitter.split_documents(documents)
+
+    # Normalize chunk text once here so retrieval never re-strips it per request
+    for chunk in chunks:
+        chunk.page_content = chunk.page_content.strip()
+    chunks = [chunk for chunk in chunks if chunk.page_content]
+
     print(f"\nSplit {len(documents)} documents into {len(chunks)} chunks")
     return chunks
 
@@ -89,6 +103,7 @@ def create_vector_store(chunks, vector_db_dir: Path, embedding_model: str):
         documents=chunks,
         embedding=embeddings,
         persist_directory=str(vector_db_dir),
+        collection_metadata=HNSW_METADATA,
     )
 
     # ChromaDB auto-persists, no need to call persist() explicitly
@@ -97,6 +112,50 @@ def create_vector_store(chunks, vector_db_dir: Path, embedding_model: str):
     return vectorstore
 
 
+def quantize_int8(matrix: np.ndarray) -> np.ndarray:
+    """
+    Symmetric per-row int8 quantization (each row scaled so max |x| is 127).
+
+    Per-row scales are not stored: cosine similarity is scale-invariant, so
+    int8 rows rank the same as their float32 originals up to rounding.
+    """
+    scale = 127.0 / np.clip(np.abs(matrix).max(axis=1, keepdims=True), 1e-12, None)
+    return np.round(matrix * scale).astype(np.int8)
+
+
+def export_exact_index(vectorstore, index_dir: Path):
+    """
+    Persist each PDF's chunk embeddings as a contiguous float32 (N, 384) matrix.
+
+    Writes `<pdf stem>.npy` (embeddings), `<pdf stem>.i8.npy` (the same rows
+    quantized to int8) and `<pdf stem>.json` (chunk text and metadata, same row
+    order) so the RAG engine can run an exact top-k per diagnosis instead of an
+    HNSW traversal.
+    """
+    data = vectorstore.get(include=["embeddings", "documents", "metadatas"])
+
+    by_pdf = {}
+    for embedding, text, metadata in zip(
+        data["embeddings"], data["documents"], data["metadatas"]
+    ):
+        pdf_name = (metadata or {}).get("source_file", "unknown")
+        by_pdf.setdefault(pdf_name, []).append((embedding, text, metadata))
+
+    index_dir.mkdir(parents=True, exist_ok=True)
+    for pdf_name, rows in by_pdf.items():
+        stem = Path(pdf_name).stem
+        matrix = np.asarray([row[0] for row in rows], dtype=np.float32)
+        np.save(index_dir / f"{stem}.npy", matrix)
+        np.save(index_dir / f"{stem}.i8.npy", quantize_int8(matrix))
+        with open(index_dir / f"{stem}.json", "w") as f:
+            json.dump(
+                [{"page_content": text, "metadata": meta} for _, text, meta in rows], f
+            )
+        print(f"  ✓ {pdf_name}: {matrix.shape[0]} chunk embeddings")
+
+    print(f"  ✓ Exact index saved to {index_dir}")
+
+
 def main():
     """Main ingestion pipeline."""
     print("=" * 60)
@@ -119,8 +178,12 @@ def main():
     print("\n[Step 3] Creating vector store...")
     vectorstore = create_vector_store(chunks, VECTOR_DB_DIR, EMBEDDING_MODEL)
 
-    # Step 4: Verify
-    print("\n[Step 4] Verifying vector store...")
+    # Step 4: Export per-PDF embedding matrices
+    print("\n[Step 4] Exporting per-PDF embedding matrices...")
+    export_exact_index(vectorstore, EXACT_INDEX_DIR)
+
+    # Step 5: Verify
+    print("\n[Step 5] Verifying vector store...")
     sample_query = "myocardial infarction"
     results = vectorstore.similarity_search(sample_query, k=2)
     print(f"  ✓ Test query '{sample_query}' returned {len(results)} results")
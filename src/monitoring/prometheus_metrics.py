@@ -15,15 +15,18 @@ The `start_prometheus_metrics` function is used by the dedicated
 
 from __future__ import annotations
 
-import time
-from typing import Optional
+import functools
+import logging
+import threading
+from typing import Callable
 
 from prometheus_client import (
     Counter,
     Histogram,
-    Gauge,
     start_http_server,
 )
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
 
 
 # ---------------------------------------------------------
@@ -130,15 +133,41 @@ TOKENS_GENERATED_TOTAL = Counter(
 # DATA DRIFT & MODEL MONITORING
 # ---------------------------------------------------------
 
-MODEL_VERSION = Gauge(
-    "model_version",
-    "Current model version number",
-)
 
-DATA_DRIFT_SCORE = Gauge(
-    "data_drift_score",
-    "Evidently data drift score (0-1)",
-)
+class StateCollector(Collector):
+    """
+    Point-in-time gauges read only when Prometheus scrapes.
+
+    Writers just assign plain attributes; no Gauge lock is taken until
+    `collect()` runs at scrape time.
+    """
+
+    def __init__(self) -> None:
+        self.model_version: int = 0
+        self.data_drift_score: float = 0.0
+        self.active_predictions: int = 0
+
+    def collect(self):
+        yield GaugeMetricFamily(
+            "model_version",
+            "Current model version number",
+            value=self.model_version,
+        )
+        yield GaugeMetricFamily(
+            "data_drift_score",
+            "Evidently data drift score (0-1)",
+            value=self.data_drift_score,
+        )
+        yield GaugeMetricFamily(
+            "active_predictions_current",
+            "Currently active predictions",
+            value=self.active_predictions,
+        )
+
+
+# Holds model_version, data_drift_score and active_predictions_current
+STATE = StateCollector()
+REGISTRY.register(STATE)
 
 GUARDRAIL_VIOLATIONS_TOTAL = Counter(
     "guardrail_violations_total",
@@ -168,16 +197,36 @@ ERRORS_TOTAL = Counter(
     ["error_type"],
 )
 
-ACTIVE_PREDICTIONS = Gauge(
-    "active_predictions_current",
-    "Currently active predictions",
-)
-
 # ---------------------------------------------------------
 # Recording Helpers
 # ---------------------------------------------------------
 
+logger = logging.getLogger("heartsight.metrics")
+
+# Flipped off on the first recording failure so metrics never break requests
+METRICS_ENABLED = True
+
+
+def _safe(fn: Callable[..., None]) -> Callable[..., None]:
+    """Skip recording once metrics are disabled; disable them on first failure."""
 
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs) -> None:
+        global METRICS_ENABLED
+        if not METRICS_ENABLED:
+            return
+        try:
+            fn(*args, **kwargs)
+        except Exception:
+            METRICS_ENABLED = False
+            logger.exception(
+                "Metrics recording failed in %s; disabling metrics", fn.__name__
+            )
+
+    return wrapper
+
+
+@_safe
 def record_prediction(
     *,
     predicted_class: str,
@@ -188,111 +237,90 @@ def record_prediction(
     total_latency: float = 0.0,
 ) -> None:
     """Record a complete prediction with all metrics."""
-    try:
-        PREDICTION_REQUESTS_TOTAL.labels(status=status).inc()
-        PREDICTIONS_TOTAL.inc()
-        PREDICTION_CLASS_DISTRIBUTION.labels(predicted_class=predicted_class).inc()
-        PREDICTION_CONFIDENCE.observe(confidence)
-        MODEL_PREDICTION_LATENCY.observe(model_latency)
-        if rag_latency > 0:
-            RAG_LATENCY_SECONDS.observe(rag_latency)
-            PREDICTION_LATENCY_SECONDS.labels(stage="rag").observe(rag_latency)
-        PREDICTION_LATENCY_SECONDS.labels(stage="model").observe(model_latency)
-        PREDICTION_LATENCY_SECONDS.labels(stage="total").observe(
-            model_latency + rag_latency
-        )
-        if total_latency > 0:
-            PREDICTION_AVG_TIME_SECONDS.observe(total_latency)
-    except Exception:
-        pass
-
-
+    PREDICTION_REQUESTS_TOTAL.labels(status=status).inc()
+    PREDICTIONS_TOTAL.inc()
+    PREDICTION_CLASS_DISTRIBUTION.labels(predicted_class=predicted_class).inc()
+    PREDICTION_CONFIDENCE.observe(confidence)
+    MODEL_PREDICTION_LATENCY.observe(model_latency)
+    if rag_latency > 0:
+        RAG_LATENCY_SECONDS.observe(rag_latency)
+        PREDICTION_LATENCY_SECONDS.labels(stage="rag").observe(rag_latency)
+    PREDICTION_LATENCY_SECONDS.labels(stage="model").observe(model_latency)
+    PREDICTION_LATENCY_SECONDS.labels(stage="total").observe(
+        model_latency + rag_latency
+    )
+    if total_latency > 0:
+        PREDICTION_AVG_TIME_SECONDS.observe(total_latency)
+
+
+@_safe
 def record_llm_call(
     *, endpoint: str, latency_seconds: float, tokens: int, cost_usd: float = 0.0
 ) -> None:
     """Record a single LLM call in Prometheus metrics."""
-    label = {"endpoint": endpoint}
-    try:
-        LLM_LATENCY_SECONDS.labels(**label).observe(latency_seconds)
-        LLM_TOKENS_TOTAL.labels(**label).inc(max(tokens, 0))
-        if cost_usd > 0:
-            LLM_COST_USD_TOTAL.labels(**label).inc(cost_usd)
-    except Exception:
-        pass
+    LLM_LATENCY_SECONDS.labels(endpoint).observe(latency_seconds)
+    LLM_TOKENS_TOTAL.labels(endpoint).inc(max(tokens, 0))
+    if cost_usd > 0:
+        LLM_COST_USD_TOTAL.labels(endpoint).inc(cost_usd)
 
 
+@_safe
 def record_rag_explanation(latency_seconds: float, tokens: int = 0) -> None:
     """Record RAG explanation generation."""
-    try:
-        RAG_EXPLANATIONS_GENERATED.inc()
-        RAG_LATENCY_SECONDS.observe(latency_seconds)
-        if tokens > 0:
-            TOKENS_GENERATED_TOTAL.inc(tokens)
-    except Exception:
-        pass
+    RAG_EXPLANATIONS_GENERATED.inc()
+    RAG_LATENCY_SECONDS.observe(latency_seconds)
+    if tokens > 0:
+        TOKENS_GENERATED_TOTAL.inc(tokens)
 
 
+@_safe
 def record_chat_message(latency_seconds: float, tokens: int = 0) -> None:
     """Record a chat message and latency/tokens."""
-    try:
-        CHAT_MESSAGES_TOTAL.inc()
-        CHAT_RESPONSES_TOTAL.inc()
-        CHAT_AVG_TIME_SECONDS.observe(latency_seconds)
-        if tokens > 0:
-            TOKENS_GENERATED_TOTAL.inc(tokens)
-    except Exception:
-        pass
+    CHAT_MESSAGES_TOTAL.inc()
+    CHAT_RESPONSES_TOTAL.inc()
+    CHAT_AVG_TIME_SECONDS.observe(latency_seconds)
+    if tokens > 0:
+        TOKENS_GENERATED_TOTAL.inc(tokens)
 
 
+@_safe
 def record_guardrail_event(*, endpoint: str, stage: str, rule: str) -> None:
     """Increment guardrail violations counter."""
-    try:
-        GUARDRAIL_VIOLATIONS_TOTAL.labels(
-            endpoint=endpoint, stage=stage, rule=rule
-        ).inc()
-    except Exception:
-        pass
+    GUARDRAIL_VIOLATIONS_TOTAL.labels(endpoint=endpoint, stage=stage, rule=rule).inc()
 
 
 def set_model_version(version: int) -> None:
-    """Set the current model version."""
-    try:
-        MODEL_VERSION.set(version)
-    except Exception:
-        pass
+    """Set the current model version (exported on the next scrape)."""
+    STATE.model_version = version
 
 
 def set_data_drift_score(score: float) -> None:
-    """Update data drift score from Evidently."""
-    try:
-        DATA_DRIFT_SCORE.set(score)
-    except Exception:
-        pass
+    """Update data drift score from Evidently (exported on the next scrape)."""
+    STATE.data_drift_score = score
 
 
+@_safe
 def record_api_request(method: str, endpoint: str, status: int, latency: float) -> None:
     """Record API request metrics."""
-    try:
-        API_REQUESTS_TOTAL.labels(method=method, endpoint=endpoint, status=status).inc()
-        API_LATENCY_SECONDS.labels(endpoint=endpoint).observe(latency)
-    except Exception:
-        pass
+    API_REQUESTS_TOTAL.labels(method=method, endpoint=endpoint, status=status).inc()
+    API_LATENCY_SECONDS.labels(endpoint=endpoint).observe(latency)
 
 
+@_safe
 def record_error(error_type: str) -> None:
     """Record an error occurrence."""
-    try:
-        ERRORS_TOTAL.labels(error_type=error_type).inc()
-    except Exception:
-        pass
+    ERRORS_TOTAL.labels(error_type=error_type).inc()
 
 
 # ---------------------------------------------------------
 # Exporter entrypoint (used by metrics container)
 # ---------------------------------------------------------
 
+# Set to stop the exporter; the serving thread blocks on it without polling.
+_stop = threading.Event()
+
 
-def start_prometheus_metrics(port: int = 9000, sleep_interval: Optional[int] = 5):
+def start_prometheus_metrics(port: int = 9000):
     """
     Start the Prometheus HTTP server.
 
@@ -301,16 +329,15 @@ def start_prometheus_metrics(port: int = 9000, sleep_interval: Optional[int] = 5
 
     When run as a standalone process (metrics container), it will:
     - start the HTTP server on the given port
-    - sleep in a loop to keep the process alive
+    - block until `_stop` is set (or Ctrl+C) to keep the process alive
     """
 
     start_http_server(port)
     print(f"Prometheus metrics available at http://localhost:{port}/")
 
-    # Keep the exporter process alive
+    # Keep the exporter process alive without periodic wakeups
     try:
-        while True:
-            time.sleep(sleep_interval or 5)
+        _stop.wait()
     except KeyboardInterrupt:
         print("Prometheus metrics exporter stopped.")
 
@@ -3,13 +3,21 @@ RAG Engine for ECG Explanation Generation
 Uses Chroma vector DB + Gemini 2.5 Flash to generate patient-friendly ECG explanations.
 """
 
+import asyncio
+import hashlib
+import json
+import logging
 import os
+import threading
 import time
 import warnings
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, Iterator, List
 from dotenv import load_dotenv
 import google.generativeai as genai
+from google.api_core.exceptions import GoogleAPIError
+import numpy as np
 
 # LangChain imports
 from langchain_huggingface import HuggingFaceEmbeddings
@@ -19,18 +27,41 @@ try:
 except ImportError:
     from langchain_community.vectorstores import Chroma
 
-from langchain_core.prompts import PromptTemplate
+from langchain_core.documents import Document
+
+try:  # int8 SIMD cosine kernels for the exact index (optional)
+    import simsimd
+except ImportError:  # pragma: no cover - falls back to float32 NumPy scoring
+    simsimd = None
+
+try:  # persistent retrieval cache shared across restarts (optional)
+    import diskcache
+except ImportError:  # pragma: no cover - in-memory LRU only
+    diskcache = None
 
 from src.guardrails import apply_guardrails_to_output
+from src.utils.onnx_embeddings import (
+    ONNX_EMBEDDING_DIR,
+    ONNX_MODEL_FILE,
+    ONNXMiniLMEmbeddings,
+)
 
 try:
-    from src.monitoring.prometheus_metrics import observe_llm_call
+    from src.monitoring.prometheus_metrics import record_llm_call
 except Exception:  # pragma: no cover - metrics optional
 
-    def observe_llm_call(*args, **kwargs):  # type: ignore[no-redef]
+    def record_llm_call(*args, **kwargs):  # type: ignore[no-redef]
         return None
 
 
+# Per-request progress is logged at DEBUG; set ECG_LOG_LEVEL=DEBUG to see it
+logger = logging.getLogger("heartsight.rag")
+_log_level = os.getenv("ECG_LOG_LEVEL", "INFO").upper()
+if _log_level not in logging.getLevelNamesMapping():
+    # An unknown name makes setLevel raise ValueError at import time
+    _log_level = "INFO"
+logger.setLevel(_log_level)
+
 # Suppress noisy warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -40,8 +71,38 @@ load_dotenv()
 
 # Configuration
 VECTOR_DB_DIR = Path("data/vector_db")
+EXACT_INDEX_DIR = VECTOR_DB_DIR / "exact"  # written by src/ingest.py
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 
+RETRIEVAL_CACHE_DIR = Path(os.getenv("RETRIEVAL_CACHE_DIR", "data/cache/retrieval"))
+RETRIEVAL_CACHE_TTL_SECONDS = int(
+    os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", str(7 * 24 * 3600))
+)
+
+# Guideline chunks per explanation; the corpus is five PDFs, so two suffice
+RETRIEVAL_K = 2
+
+# int8 scoring shortlists this many chunks for the exact float32 rerank
+EXACT_RERANK_CANDIDATES = 10
+
+# Guarded Gemini explanations, keyed by the exact prompt (needs diskcache)
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_DIR = Path(os.getenv("RESPONSE_CACHE_DIR", "data/cache/llm"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+
+# Async retrievals arriving within this window are served as one batch
+RETRIEVAL_BATCH_WINDOW_SECONDS = float(
+    os.getenv("RETRIEVAL_BATCH_WINDOW_SECONDS", "0.005")
+)
+
+# After a Gemini outage error, serve fallbacks (skipping retrieval) for this long
+LLM_RETRY_COOLDOWN_SECONDS = float(os.getenv("LLM_RETRY_COOLDOWN_SECONDS", "30"))
+
+# Errors that mean Gemini itself is unreachable or failing (API status,
+# transport, timeouts). Anything else, e.g. `response.text` raising on a
+# safety-blocked candidate, is specific to one prompt and only falls back there.
+LLM_OUTAGE_ERRORS = (GoogleAPIError, ConnectionError, TimeoutError)
+
 # Diagnosis → search terms
 DIAGNOSIS_SEARCH_MAP = {
     "NORM": ["normal ECG", "healthy heart rhythm", "normal sinus rhythm"],
@@ -51,7 +112,7 @@ DIAGNOSIS_SEARCH_MAP = {
     "HYP": ["hypertrophy", "LVH", "ventricular thickening"],
 }
 
-# For future filtering (optional)
+# Diagnosis → guideline PDFs searched first (matches ingest "source_file")
 DIAGNOSIS_PDF_MAP = {
     "NORM": ["General_ECG_Guide.pdf"],
     "MI": ["MI_Recovery_Guide.pdf"],
@@ -61,10 +122,50 @@ DIAGNOSIS_PDF_MAP = {
 }
 
 
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def _age_bucket(age: Optional[int]) -> str:
+    """Collapse age into the bucket used for retrieval queries."""
+    return "elderly" if age and age > 50 else "adult"
+
+
+@lru_cache(maxsize=128)
+def _build_query(diagnosis: str, age_bucket: str, sex_norm: str) -> str:
+    """Retrieval query for a diagnosis and a bucketed patient profile."""
+    base_terms = DIAGNOSIS_SEARCH_MAP.get(diagnosis, [diagnosis.lower()])
+    return " ".join(base_terms + [age_bucket, sex_norm]).strip()
+
+
+# Explanation prompt: only age, sex, diagnosis and context vary per request,
+# so the fixed text is kept as constants and joined with an f-string.
+PROMPT_HEAD = """
+You are a compassionate cardiologist explaining ECG results to a patient.
+
+Patient Information:
+"""
+
+PROMPT_INSTRUCTIONS = """Instructions:
+1. Explain what the ECG findings mean in simple language.
+2. Provide medically accurate insight tailored to this patient's age and sex.
+3. Give clear, safe next-step recommendations.
+4. Be empathetic, reassuring, and easy to understand.
+5. Do NOT provide medication dosages or specific treatments.
+
+Your explanation:
+"""
+
+
 class ECGExplainer:
     """RAG-based ECG explanation engine using Gemini 2.5 Flash."""
 
-    def __init__(self):
+    def __init__(self, warm_cache: bool = True):
         print("📘 Initializing ECG RAG Engine...")
 
         # Validate vector DB exists
@@ -74,20 +175,36 @@ class ECGExplainer:
                 f"Run: python manage.py ingest"
             )
 
-        # Load embeddings
-        print("🔤 Loading embedding model...")
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name=EMBEDDING_MODEL,
-            model_kwargs={"device": "cpu"},
-            encode_kwargs={"normalize_embeddings": True},
+        # Embedding model, Chroma and the exact index load on first retrieval
+        # (see _ensure_loaded), so constructing the explainer stays cheap.
+        self.embeddings = None
+        self.vectorstore = None
+        self.pdf_matrices: Dict[str, np.ndarray] = {}
+        self.pdf_matrices_i8: Dict[str, np.ndarray] = {}
+        self.pdf_docs: Dict[str, List[Document]] = {}
+        self._query_vectors: Dict[str, List[float]] = {}
+        self._embed_other_query = None
+        self._warm_cache = warm_cache
+        self._loaded = False
+        self._load_lock = threading.Lock()
+
+        # Retrieved context depends only on (diagnosis, query, k): reuse it,
+        # in memory and (with diskcache) on disk across restarts
+        self._cached_search = lru_cache(maxsize=512)(self._search)
+        self._disk_cache = self._open_disk_cache(RETRIEVAL_CACHE_DIR)
+        self._index_fingerprint = self._vector_db_fingerprint()
+        self.response_cache = (
+            self._open_disk_cache(RESPONSE_CACHE_DIR)
+            if RESPONSE_CACHE_ENABLED
+            else None
         )
 
-        # Load Chroma DB
-        print(f"🗂️ Loading vector DB from: {VECTOR_DB_DIR}")
-        self.vectorstore = Chroma(
-            persist_directory=str(VECTOR_DB_DIR),
-            embedding_function=self.embeddings,
-        )
+        # In-flight async Gemini calls, keyed by prompt (see _agenerate_text)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.batch_retriever = BatchRetriever(self)
+
+        # monotonic() deadline before which Gemini is assumed to be down
+        self._llm_down_until = 0.0
 
         # Gemini setup
         gemini_key = os.getenv("GEMINI_API_KEY")
@@ -102,62 +219,226 @@ class ECGExplainer:
         self.llm = genai.GenerativeModel("gemini-2.5-flash")
         print("   ✅ Gemini model loaded successfully.")
 
-        # Prompt template
-        self.prompt_template = PromptTemplate(
-            input_variables=["context", "age", "sex", "diagnosis"],
-            template="""
-You are a compassionate cardiologist explaining ECG results to a patient.
+        print("✨ RAG Engine ready.\n")
 
-Patient Information:
-- Age: {age}
-- Sex: {sex}
-- ECG Diagnosis: {diagnosis}
+    def warm_up(self) -> None:
+        """Load retrieval resources now instead of on the first request."""
+        self._ensure_loaded()
+
+    def _ensure_loaded(self) -> None:
+        """Load the embedding model, Chroma and the exact index exactly once."""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
+
+            print("🔤 Loading embedding model...")
+            self.embeddings = self._load_embeddings()
+
+            print(f"🗂️ Loading vector DB from: {VECTOR_DB_DIR}")
+            self.vectorstore = Chroma(
+                persist_directory=str(VECTOR_DB_DIR),
+                embedding_function=self.embeddings,
+            )
 
-Medical Context from Guidelines:
-{context}
+            # Per-PDF embedding matrices for exact search (Chroma is the fallback)
+            self.pdf_matrices, self.pdf_matrices_i8, self.pdf_docs = (
+                self._load_exact_index()
+            )
 
-Instructions:
-1. Explain what the ECG findings mean in simple language.
-2. Provide medically accurate insight tailored to this patient's age and sex.
-3. Give clear, safe next-step recommendations.
-4. Be empathetic, reassuring, and easy to understand.
-5. Do NOT provide medication dosages or specific treatments.
+            # Retrieval queries come from a small fixed vocabulary: embed each once
+            self._embed_other_query = lru_cache(maxsize=256)(
+                self.embeddings.embed_query
+            )
+            if self._warm_cache:
+                self._warm_query_cache()
 
-Your explanation:
-""",
+            self._loaded = True
+
+    @staticmethod
+    def _open_disk_cache(directory: Path):
+        if diskcache is None:
+            return None
+        try:
+            return diskcache.Cache(str(directory))
+        except Exception as e:
+            logger.warning("Disk cache at %s disabled: %s", directory, e)
+            return None
+
+    @staticmethod
+    def _vector_db_fingerprint() -> str:
+        """Identify the current ingest so re-ingested PDFs miss the disk cache."""
+        paths = [VECTOR_DB_DIR / "chroma.sqlite3"]
+        if EXACT_INDEX_DIR.exists():
+            paths.extend(sorted(EXACT_INDEX_DIR.glob("*.json")))
+        stamps = [
+            f"{p.name}:{p.stat().st_mtime_ns}:{p.stat().st_size}"
+            for p in paths
+            if p.exists()
+        ]
+        return hashlib.sha1("|".join(stamps).encode()).hexdigest()
+
+    def _retrieval_cache_key(self, diagnosis: str, query: str, k: int) -> str:
+        raw = f"{self._index_fingerprint}|{diagnosis}|{query}|{k}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @staticmethod
+    def _load_embeddings():
+        """Prefer the INT8 ONNX export of MiniLM; fall back to sentence-transformers."""
+        if (ONNX_EMBEDDING_DIR / ONNX_MODEL_FILE).exists():
+            try:
+                embeddings = ONNXMiniLMEmbeddings(ONNX_EMBEDDING_DIR)
+                print(f"   ✅ Using INT8 ONNX embeddings from {ONNX_EMBEDDING_DIR}")
+                return embeddings
+            except Exception as e:
+                print(f"   ⚠️ ONNX embeddings unavailable ({e}); using PyTorch model")
+
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL,
+            model_kwargs={"device": "cpu"},
+            encode_kwargs={"normalize_embeddings": True},
         )
 
-        print("✨ RAG Engine ready.\n")
+    @staticmethod
+    def _load_exact_index():
+        """Memory-map each PDF's (N, 384) embedding matrices and load its chunks."""
+        matrices: Dict[str, np.ndarray] = {}
+        matrices_i8: Dict[str, np.ndarray] = {}
+        docs: Dict[str, List[Document]] = {}
+        if not EXACT_INDEX_DIR.exists():
+            return matrices, matrices_i8, docs
+
+        for chunks_path in sorted(EXACT_INDEX_DIR.glob("*.json")):
+            stem = chunks_path.stem
+            matrix_path = EXACT_INDEX_DIR / f"{stem}.npy"
+            if not matrix_path.exists():
+                continue
+            with open(chunks_path) as f:
+                records = json.load(f)
+            matrices[stem] = np.load(matrix_path, mmap_mode="r")
+            docs[stem] = [
+                Document(page_content=r["page_content"], metadata=r["metadata"] or {})
+                for r in records
+            ]
+            matrix_i8_path = EXACT_INDEX_DIR / f"{stem}.i8.npy"
+            if matrix_i8_path.exists():
+                matrices_i8[stem] = np.load(matrix_i8_path, mmap_mode="r")
+
+        print(f"   ✅ Loaded exact index for {len(matrices)} PDFs")
+        return matrices, matrices_i8, docs
+
+    def _warm_query_cache(self):
+        """Pre-embed every query `_build_query` can produce, in one batch."""
+        print("🔥 Pre-computing query embeddings...")
+        queries = list(
+            {
+                _build_query(diagnosis, age_bucket, sex_norm)
+                for diagnosis in DIAGNOSIS_SEARCH_MAP
+                for age_bucket in ("adult", "elderly")
+                for sex_norm in ("", "male", "female")
+            }
+        )
+        vectors = self.embeddings.embed_documents(queries)
+        self._query_vectors = dict(zip(queries, vectors))
 
-    # ------------------------------------------
-    # BUILD RETRIEVAL QUERY
-    # ------------------------------------------
-    def _build_query(self, diagnosis: str, age: Optional[int], sex: Optional[str]):
-        base_terms = DIAGNOSIS_SEARCH_MAP.get(diagnosis, [diagnosis.lower()])
-        age_term = "elderly" if age and age > 50 else "adult"
-        query = " ".join(base_terms + [age_term, sex.lower() if sex else ""])
-        return query.strip()
+    def _embed_query(self, query: str) -> List[float]:
+        """Return the pre-computed vector for `query`, embedding it if unseen."""
+        vector = self._query_vectors.get(query)
+        if vector is None:
+            vector = self._embed_other_query(query)
+        return vector
 
     # ------------------------------------------
     # RETRIEVE CONTEXT
     # ------------------------------------------
+    def _retrieve_context_exact(
+        self, query_vector: List[float], relevant_pdfs: List[str], k: int
+    ) -> List[Document]:
+        """Exact top-k over the PDFs' embedding matrices with one dot product."""
+        stems = [Path(p).stem for p in relevant_pdfs]
+        stems = [s for s in stems if s in self.pdf_matrices]
+        if not stems:
+            return []
+
+        # int8 rows are a quarter of the bandwidth, but only pay off with SIMD
+        use_i8 = simsimd is not None and all(s in self.pdf_matrices_i8 for s in stems)
+        matrices = self.pdf_matrices_i8 if use_i8 else self.pdf_matrices
+
+        if len(stems) == 1:
+            matrix, docs = matrices[stems[0]], self.pdf_docs[stems[0]]
+        else:
+            matrix = np.vstack([matrices[s] for s in stems])
+            docs = [doc for s in stems for doc in self.pdf_docs[s]]
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        if not use_i8:
+            # Embeddings are L2-normalized, so the dot product is cosine similarity
+            top = _top_k(matrix @ query, k)
+            return [docs[i] for i in top]
+
+        # Shortlist on int8 scores, then rerank the shortlist on float32 rows
+        # so quantization error cannot reorder the final top-k
+        query_i8 = np.round(query * (127.0 / np.abs(query).max())).astype(np.int8)
+        distances = simsimd.cdist(query_i8[None, :], matrix, metric="cosine")
+        scores = 1.0 - np.asarray(distances, dtype=np.float32)[0]
+        candidates = _top_k(scores, max(k, EXACT_RERANK_CANDIDATES))
+
+        offsets = np.cumsum([0] + [len(self.pdf_docs[s]) for s in stems])
+        owners = np.searchsorted(offsets, candidates, side="right") - 1
+        rows = np.stack(
+            [
+                self.pdf_matrices[stems[o]][i - offsets[o]]
+                for o, i in zip(owners, candidates)
+            ]
+        )
+        top = candidates[_top_k(rows @ query, k)]
+        return [docs[i] for i in top]
+
     def retrieve_context(
-        self, diagnosis: str, age: Optional[int], sex: Optional[str], k: int = 3
+        self,
+        diagnosis: str,
+        age: Optional[int],
+        sex: Optional[str],
+        k: int = RETRIEVAL_K,
     ) -> str:
 
-        print("🔍 Retrieving relevant medical context...")
-        query = self._build_query(diagnosis, age, sex)
-        print(f"   📄 Search query: {query}")
-
-        docs = self.vectorstore.similarity_search(query, k=k)
-
-        context_parts = []
-        for doc in docs:
-            src = doc.metadata.get("source", "Unknown")
-            context_parts.append(f"[Source: {src}]\n{doc.page_content.strip()}")
+        query = _build_query(diagnosis, _age_bucket(age), sex.lower() if sex else "")
+        logger.debug("Retrieving medical context; search query: %s", query)
+
+        return self._cached_search(diagnosis, query, k)
+
+    def _search(self, diagnosis: str, query: str, k: int) -> str:
+        """Embed `query`, fetch the top-k chunks and join them into context."""
+        if self._disk_cache is not None:
+            cache_key = self._retrieval_cache_key(diagnosis, query, k)
+            context = self._disk_cache.get(cache_key)
+            if context is not None:
+                return context
+
+        self._ensure_loaded()
+        query_vector = self._embed_query(query)
+
+        docs = []
+        relevant_pdfs = DIAGNOSIS_PDF_MAP.get(diagnosis)
+        if relevant_pdfs:
+            docs = self._retrieve_context_exact(query_vector, relevant_pdfs, k)
+        if relevant_pdfs and not docs:
+            # One filtered search across all relevant PDFs instead of one per PDF
+            docs = self.vectorstore.similarity_search_by_vector(
+                query_vector, k=k, filter={"source_file": {"$in": relevant_pdfs}}
+            )
+        if not docs:
+            docs = self.vectorstore.similarity_search_by_vector(query_vector, k=k)
 
-        context = "\n\n---\n\n".join(context_parts)
-        print(f"   ✅ Retrieved {len(docs)} context chunks.")
+        # Chunk text is stripped at ingest, so formatting is a single join
+        context = "\n\n---\n\n".join(
+            f"[Source: {doc.metadata.get('source', 'Unknown')}]\n{doc.page_content}"
+            for doc in docs
+        )
+        logger.debug("Retrieved %d context chunks", len(docs))
+        if self._disk_cache is not None:
+            self._disk_cache.set(cache_key, context, expire=RETRIEVAL_CACHE_TTL_SECONDS)
         return context
 
     # ------------------------------------------
@@ -168,55 +449,246 @@ Your explanation:
         diagnosis: str,
         age: Optional[int],
         sex: Optional[str],
-        k_retrieval: int = 3,
+        k_retrieval: int = RETRIEVAL_K,
     ) -> Dict:
 
-        print("🧠 Generating patient-friendly ECG explanation...")
+        logger.debug("Generating ECG explanation for %s", diagnosis)
+
+        if not self._llm_available():
+            # The fallback ignores context, so skip embedding + vector search too
+            explanation = self._fallback(diagnosis, age, sex)
+            return self._explanation_result(explanation, diagnosis, age, sex)
 
         # Retrieve context
         context = self.retrieve_context(diagnosis, age, sex, k=k_retrieval)
+        prompt = self._build_prompt(context, diagnosis, age, sex)
 
-        # Format prompt
-        prompt = self.prompt_template.format(
-            context=context,
-            age=age if age else "unknown",
-            sex=sex if sex else "unknown",
-            diagnosis=diagnosis,
-        )
+        cached = self._cached_response(prompt)
+        if cached is not None:
+            return self._explanation_result(cached, diagnosis, age, sex)
 
-        print("🤖 Calling Gemini 2.5 Flash... (This may take 5–10 seconds)")
+        logger.debug("Calling Gemini 2.5 Flash")
         llm_start = time.time()
         try:
             response = self.llm.generate_content(prompt)
-            raw_explanation = response.text.strip()
-            llm_latency = time.time() - llm_start
+            explanation = self._finish_explanation(
+                prompt, response.text, time.time() - llm_start
+            )
+            self._store_response(prompt, explanation)
+        except Exception as e:
+            self._handle_llm_error(e)
+            explanation = self._fallback(diagnosis, age, sex)
 
-            # Approximate token usage: prompt + response word count
-            approx_tokens = len(prompt.split()) + len(raw_explanation.split())
+        return self._explanation_result(explanation, diagnosis, age, sex)
 
-            # Apply output guardrails (e.g., block dosages)
-            guardrail_result = apply_guardrails_to_output(
-                text=raw_explanation, endpoint="rag_explanation"
-            )
-            explanation = guardrail_result.text
-
-            # Record LLM metrics (latency, tokens, cost=0 for now)
-            observe_llm_call(
-                endpoint="rag_explanation",
-                latency_seconds=llm_latency,
-                tokens=approx_tokens,
-                cost_usd=0.0,
-            )
+    async def agenerate_explanation(
+        self,
+        diagnosis: str,
+        age: Optional[int],
+        sex: Optional[str],
+        k_retrieval: int = RETRIEVAL_K,
+    ) -> Dict:
+        """
+        Async variant of `generate_explanation`.
 
-            print(
-                f"   ✅ Explanation generated successfully in {llm_latency:.2f}s "
-                f"({approx_tokens} approx. tokens)"
-            )
+        Retrieval runs in a worker thread and the Gemini call is awaited, so
+        the event loop keeps serving other patients while Gemini generates.
+        """
+
+        logger.debug("Generating ECG explanation for %s (async)", diagnosis)
+
+        if not self._llm_available():
+            # The fallback ignores context, so skip embedding + vector search too
+            explanation = self._fallback(diagnosis, age, sex)
+            return self._explanation_result(explanation, diagnosis, age, sex)
+
+        context = await self.batch_retriever.get(diagnosis, age, sex, k_retrieval)
+        prompt = self._build_prompt(context, diagnosis, age, sex)
 
+        cached = await asyncio.to_thread(self._cached_response, prompt)
+        if cached is not None:
+            return self._explanation_result(cached, diagnosis, age, sex)
+
+        llm_start = time.time()
+        try:
+            raw_text = await self._agenerate_text(prompt)
+            explanation = self._finish_explanation(
+                prompt, raw_text, time.time() - llm_start
+            )
+            await asyncio.to_thread(self._store_response, prompt, explanation)
         except Exception as e:
-            print(f"   ⚠️ Gemini API failed: {e}")
+            self._handle_llm_error(e)
             explanation = self._fallback(diagnosis, age, sex)
 
+        return self._explanation_result(explanation, diagnosis, age, sex)
+
+    def stream_explanation(
+        self,
+        diagnosis: str,
+        age: Optional[int],
+        sex: Optional[str],
+        k_retrieval: int = RETRIEVAL_K,
+    ) -> Iterator[str]:
+        """
+        Yield the explanation paragraph by paragraph as Gemini generates it.
+
+        Output guardrails need whole sentences, so streamed tokens are
+        buffered until a paragraph completes, moderated, then yielded. A toxic
+        paragraph is replaced by the refusal and the stream ends there;
+        paragraphs already yielded have reached the client, so unlike
+        `generate_explanation` the refusal only covers the rest of the reply.
+        """
+
+        logger.debug("Streaming ECG explanation for %s", diagnosis)
+
+        if not self._llm_available():
+            yield self._fallback(diagnosis, age, sex)
+            return
+
+        context = self.retrieve_context(diagnosis, age, sex, k=k_retrieval)
+        prompt = self._build_prompt(context, diagnosis, age, sex)
+
+        def paragraphs() -> Iterator[str]:
+            buffer = ""
+            for chunk in self.llm.generate_content(prompt, stream=True):
+                buffer += chunk.text
+                *completed, buffer = buffer.split("\n\n")
+                yield from completed
+            yield buffer
+
+        llm_start = time.time()
+        streamed = []
+        try:
+            for paragraph in paragraphs():
+                if not paragraph.strip():
+                    continue
+                streamed.append(paragraph)
+                result = apply_guardrails_to_output(
+                    text=paragraph.strip(), endpoint="rag_explanation"
+                )
+                if any(event.rule == "toxicity_filter" for event in result.events):
+                    yield result.text
+                    break
+                yield result.text + "\n\n"
+        except Exception as e:
+            self._handle_llm_error(e)
+            if not streamed:
+                yield self._fallback(diagnosis, age, sex)
+            return
+
+        self._record_llm_metrics(prompt, "\n\n".join(streamed), time.time() - llm_start)
+
+    def _response_cache_key(self, prompt: str) -> str:
+        # The prompt fixes diagnosis, age, sex and context; the fingerprint
+        # drops replies written against a previous ingest
+        return hashlib.sha1(f"{self._index_fingerprint}|{prompt}".encode()).hexdigest()
+
+    def _cached_response(self, prompt: str) -> Optional[str]:
+        if self.response_cache is None:
+            return None
+        try:
+            return self.response_cache.get(self._response_cache_key(prompt))
+        except Exception as e:
+            logger.warning("Response cache lookup failed: %s", e)
+            return None
+
+    def _store_response(self, prompt: str, explanation: str) -> None:
+        if self.response_cache is None:
+            return
+        try:
+            self.response_cache.set(
+                self._response_cache_key(prompt),
+                explanation,
+                expire=RESPONSE_CACHE_TTL_SECONDS,
+            )
+        except Exception as e:
+            logger.warning("Response cache store failed: %s", e)
+
+    def _llm_available(self) -> bool:
+        return time.monotonic() >= self._llm_down_until
+
+    def _handle_llm_error(self, error: Exception) -> None:
+        """Log a failed Gemini call; start the cooldown only for outages."""
+        logger.warning("Gemini API failed: %s", error)
+        if isinstance(error, LLM_OUTAGE_ERRORS):
+            self._mark_llm_failed()
+
+    def _mark_llm_failed(self) -> None:
+        self._llm_down_until = time.monotonic() + LLM_RETRY_COOLDOWN_SECONDS
+        logger.warning(
+            "Serving fallback explanations for %.0fs", LLM_RETRY_COOLDOWN_SECONDS
+        )
+
+    async def _agenerate_text(self, prompt: str) -> str:
+        """
+        Await Gemini's reply for `prompt`, coalescing concurrent duplicates.
+
+        Gemini takes one prompt per request, so instead of batching, requests
+        that arrive while an identical prompt is in flight share that call.
+        """
+        task = self._inflight.get(prompt)
+        if task is None:
+
+            async def call() -> str:
+                response = await self.llm.generate_content_async(prompt)
+                return response.text
+
+            task = asyncio.ensure_future(call())
+            self._inflight[prompt] = task
+            task.add_done_callback(lambda _: self._inflight.pop(prompt, None))
+
+        # Shield so one cancelled request does not cancel the shared call
+        return await asyncio.shield(task)
+
+    def _build_prompt(
+        self, context: str, diagnosis: str, age: Optional[int], sex: Optional[str]
+    ) -> str:
+        return (
+            f"{PROMPT_HEAD}"
+            f"- Age: {age if age else 'unknown'}\n"
+            f"- Sex: {sex if sex else 'unknown'}\n"
+            f"- ECG Diagnosis: {diagnosis}\n\n"
+            f"Medical Context from Guidelines:\n{context}\n\n"
+            f"{PROMPT_INSTRUCTIONS}"
+        )
+
+    def _finish_explanation(
+        self, prompt: str, raw_text: str, llm_latency: float
+    ) -> str:
+        """Apply output guardrails and record LLM metrics for a Gemini reply."""
+        raw_explanation = raw_text.strip()
+
+        # Apply output guardrails (e.g., block dosages)
+        guardrail_result = apply_guardrails_to_output(
+            text=raw_explanation, endpoint="rag_explanation"
+        )
+
+        self._record_llm_metrics(prompt, raw_explanation, llm_latency)
+        return guardrail_result.text
+
+    @staticmethod
+    def _record_llm_metrics(prompt: str, response: str, llm_latency: float) -> None:
+        # Approximate token usage: prompt + response word count
+        approx_tokens = len(prompt.split()) + len(response.split())
+
+        # Record LLM metrics (latency, tokens, cost=0 for now)
+        record_llm_call(
+            endpoint="rag_explanation",
+            latency_seconds=llm_latency,
+            tokens=approx_tokens,
+            cost_usd=0.0,
+        )
+
+        logger.debug(
+            "Explanation generated in %.2fs (%d approx. tokens)",
+            llm_latency,
+            approx_tokens,
+        )
+
+    @staticmethod
+    def _explanation_result(
+        explanation: str, diagnosis: str, age: Optional[int], sex: Optional[str]
+    ) -> Dict:
         return {
             "explanation": explanation,
             "diagnosis": diagnosis,
@@ -248,14 +720,99 @@ Your explanation:
         return base
 
 
+class BatchRetriever:
+    """
+    Coalesce concurrent async retrievals of queries with no known vector.
+
+    Queries `_warm_query_cache` already embedded (and every query before the
+    first lazy load, when there is no model to batch on) go straight to the
+    explainer's cached search in their own worker thread. Other queries
+    arriving within `window_seconds` of the first pending one are embedded in
+    a single `embed_documents` batch, then searched concurrently.
+    """
+
+    def __init__(
+        self,
+        explainer: ECGExplainer,
+        window_seconds: float = RETRIEVAL_BATCH_WINDOW_SECONDS,
+    ):
+        self.explainer = explainer
+        self.window_seconds = window_seconds
+        self._pending: List[tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def get(
+        self, diagnosis: str, age: Optional[int], sex: Optional[str], k: int
+    ) -> str:
+        explainer = self.explainer
+        query = _build_query(diagnosis, _age_bucket(age), sex.lower() if sex else "")
+        if not explainer._loaded or query in explainer._query_vectors:
+            return await asyncio.to_thread(
+                explainer._cached_search, diagnosis, query, k
+            )
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((diagnosis, query, k, future))
+        if self._flush_task is None:
+            self._flush_task = asyncio.ensure_future(self._flush_after_window())
+        return await future
+
+    async def _flush_after_window(self) -> None:
+        await asyncio.sleep(self.window_seconds)
+        batch, self._pending = self._pending, []
+        self._flush_task = None
+
+        await asyncio.to_thread(self._embed_batch, {query for _, query, _, _ in batch})
+        outcomes = await asyncio.gather(
+            *(
+                asyncio.to_thread(self.explainer._cached_search, diagnosis, query, k)
+                for diagnosis, query, k, _ in batch
+            ),
+            return_exceptions=True,
+        )
+
+        # Each request gets its own result or error; one failure must not
+        # fail the other patients batched with it
+        for (*_, future), outcome in zip(batch, outcomes):
+            if future.done():  # the awaiting request may have been cancelled
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    def _embed_batch(self, queries: set) -> None:
+        """Embed the queries still missing a vector in one forward pass."""
+        explainer = self.explainer
+        unseen = [q for q in queries if q not in explainer._query_vectors]
+        if not unseen:
+            return
+        try:
+            vectors = explainer.embeddings.embed_documents(unseen)
+            explainer._query_vectors.update(zip(unseen, vectors))
+        except Exception as e:
+            # _search embeds each query itself on a table miss
+            logger.warning("Batched query embedding failed: %s", e)
+
+
 # ---------------------------------------------------------
 # GLOBAL SINGLETON
 # ---------------------------------------------------------
 _explainer: Optional[ECGExplainer] = None
+_explainer_lock = threading.Lock()
 
 
 def get_explainer() -> ECGExplainer:
+    """
+    Return the process-wide explainer, building it exactly once.
+
+    Sync routes run in a threadpool, so concurrent first requests would
+    otherwise each load MiniLM and open Chroma. The single instance also
+    keeps one Gemini client (and its persistent connection) for all calls.
+    """
     global _explainer
     if _explainer is None:
-        _explainer = ECGExplainer()
+        with _explainer_lock:
+            if _explainer is None:
+                _explainer = ECGExplainer()
     return _explainer
@@ -0,0 +1,97 @@
+"""
+INT8-quantized ONNX Runtime embeddings for all-MiniLM-L6-v2.
+
+A LangChain `Embeddings` drop-in for `HuggingFaceEmbeddings` that runs the
+dynamically quantized model on ONNX Runtime's CPU provider (VNNI int8 dot
+products where supported). Output matches `normalize_embeddings=True`:
+mean pooling over the attention mask followed by L2 normalization.
+
+Build the quantized export once (requires `optimum[onnxruntime]`):
+    python src/utils/onnx_embeddings.py
+"""
+
+import os
+from pathlib import Path
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+ONNX_EMBEDDING_DIR = Path(
+    os.getenv("ONNX_EMBEDDING_DIR", "data/embeddings/minilm_onnx_int8")
+)
+ONNX_MODEL_FILE = "model_quantized.onnx"
+MAX_SEQ_LENGTH = 256  # sentence-transformers default for all-MiniLM-L6-v2
+
+
+class ONNXMiniLMEmbeddings(Embeddings):
+    """MiniLM sentence embeddings served by an INT8 ONNX Runtime session."""
+
+    def __init__(self, model_dir: Path = ONNX_EMBEDDING_DIR):
+        # Imported lazily so this module can be imported without onnxruntime
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        model_dir = Path(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(model_dir))
+        self.session = ort.InferenceSession(
+            str(model_dir / ONNX_MODEL_FILE), providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {node.name for node in self.session.get_inputs()}
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=MAX_SEQ_LENGTH,
+            return_tensors="np",
+        )
+        inputs = {
+            name: array for name, array in encoded.items() if name in self._input_names
+        }
+        token_embeddings = self.session.run(None, inputs)[0]  # (batch, tokens, 384)
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (token_embeddings * mask).sum(axis=1) / np.clip(
+            mask.sum(axis=1), 1e-9, None
+        )
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed(list(texts)) if texts else []
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([text])[0]
+
+
+def export_quantized_model(
+    model_name: str = EMBEDDING_MODEL, output_dir: Path = ONNX_EMBEDDING_DIR
+) -> Path:
+    """Export `model_name` to ONNX and apply dynamic INT8 quantization."""
+    from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    output_dir = Path(output_dir)
+    fp32_dir = output_dir / "fp32"
+
+    print(f"Exporting {model_name} to ONNX...")
+    model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+    model.save_pretrained(fp32_dir)
+
+    print("Applying dynamic INT8 quantization...")
+    quantizer = ORTQuantizer.from_pretrained(fp32_dir)
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=qconfig)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(output_dir)
+
+    print(f"✅ Quantized embedding model saved to {output_dir / ONNX_MODEL_FILE}")
+    return output_dir
+
+
+if __name__ == "__main__":
+    export_quantized_model()
@@ -1,8 +1,13 @@
+from functools import lru_cache
+
 import boto3
 from botocore.exceptions import ClientError
 
 
+@lru_cache(maxsize=1)
 def get_s3_client():
+    # Building a client reloads credentials and service models; make one and
+    # share it (botocore clients are thread-safe)
     return boto3.client("s3")
 
 
@@ -0,0 +1,103 @@
+"""
+Train/serve parity for extract_features_from_signal.
+
+The vectorized extractors (training and serving copies) and the numba kernel
+must reproduce the original per-channel NumPy loop the model was trained on,
+including NaN propagation, which XGBoost treats as a missing value.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("mlflow")
+pytest.importorskip("xgboost")
+
+from src.pipeline import train
+from src.utils import model_loader
+
+
+def reference_features(signal_array):
+    """The original extractor: one NumPy reduction per channel and statistic."""
+    features = []
+    for channel_idx in range(12):
+        channel_data = signal_array[:, channel_idx]
+        features.extend(
+            [
+                np.mean(channel_data),
+                np.std(channel_data),
+                np.min(channel_data),
+                np.max(channel_data),
+                np.percentile(channel_data, 25),
+                np.percentile(channel_data, 50),
+                np.percentile(channel_data, 75),
+                np.ptp(channel_data),
+                np.var(channel_data),
+            ]
+        )
+    return np.array(features)
+
+
+def make_signal(dtype, length=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    if np.issubdtype(dtype, np.integer):
+        return rng.integers(-2000, 2000, size=(length, 12)).astype(dtype)
+    return rng.normal(0.0, 0.3, size=(length, 12)).astype(dtype)
+
+
+def with_nan(signal_array):
+    signal_array = signal_array.copy()
+    signal_array[17, 3] = np.nan
+    return signal_array
+
+
+EXTRACTORS = [
+    pytest.param(train.extract_features_from_signal, id="train"),
+    pytest.param(model_loader.extract_features_from_signal, id="serve"),
+    # The numba kernel's Python source; compiled or not, the logic is the same
+    pytest.param(model_loader._channel_features, id="kernel"),
+]
+
+
+@pytest.mark.parametrize("extract", EXTRACTORS)
+@pytest.mark.parametrize("length", [1000, 999, 1])
+def test_matches_reference_on_float64(extract, length):
+    signal = make_signal(np.float64, length)
+    np.testing.assert_allclose(
+        extract(signal), reference_features(signal), rtol=1e-12, atol=1e-12
+    )
+
+
+@pytest.mark.parametrize("extract", EXTRACTORS)
+def test_nan_channel_is_all_nan(extract):
+    signal = with_nan(make_signal(np.float64))
+    features = extract(signal).reshape(12, 9)
+    expected = reference_features(signal).reshape(12, 9)
+
+    assert np.isnan(features[3]).all()
+    np.testing.assert_allclose(features, expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize(
+    "extract",
+    [train.extract_features_from_signal, model_loader.extract_features_from_signal],
+    ids=["train", "serve"],
+)
+@pytest.mark.parametrize("dtype", [np.int64, np.int16])
+def test_integer_signal_matches_reference(extract, dtype):
+    signal = make_signal(dtype)
+    np.testing.assert_allclose(
+        extract(signal), reference_features(signal.astype(np.float64)), rtol=1e-12
+    )
+
+
+@pytest.mark.parametrize(
+    "extract",
+    [train.extract_features_from_signal, model_loader.extract_features_from_signal],
+    ids=["train", "serve"],
+)
+def test_float32_signal_matches_reference(extract):
+    # float32 sums are accumulated in a different order, so allow float32 rounding
+    signal = with_nan(make_signal(np.float32))
+    np.testing.assert_allclose(
+        extract(signal), reference_features(signal), rtol=1e-5, atol=1e-6
+    )
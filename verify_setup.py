@@ -1,7 +1,29 @@
 """Quick verification script to check if everything is set up correctly."""
 
+import os
 from pathlib import Path
 
+
+def scan(path):
+    """Entry names in `path` from one directory read (empty if missing)."""
+    try:
+        with os.scandir(path) as entries:
+            return {entry.name for entry in entries}
+    except OSError:
+        return set()
+
+
+def has_entries(path):
+    """True if `path` is a non-empty directory; stops at the first entry."""
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is not None
+    except OSError:
+        return False
+
+
+root_entries = scan(".")
+
 print("=" * 60)
 print("HEARTSIGHT Setup Verification")
 print("=" * 60)
@@ -13,27 +35,22 @@ model_path = Path("mlruns/models/heartsight_xgb_v1")
 checks.append(("Model registered in MLflow", model_path.exists()))
 
 # Check 2: Vector DB exists
-vector_db = Path("data/vector_db")
-checks.append(
-    ("Vector database exists", vector_db.exists() and any(vector_db.iterdir()))
-)
+checks.append(("Vector database exists", has_entries("data/vector_db")))
 
 # Check 3: Sample CSV exists
-sample_csv = Path("sample_upload_TEST_PATIENT.csv")
-checks.append(("Sample CSV file exists", sample_csv.exists()))
+checks.append(
+    ("Sample CSV file exists", "sample_upload_TEST_PATIENT.csv" in root_entries)
+)
 
 # Check 4: .env file exists
-env_file = Path(".env")
-checks.append((".env file exists", env_file.exists()))
+checks.append((".env file exists", ".env" in root_entries))
 
 # Check 5: PDFs exist
-docs_dir = Path("data/docs")
-pdfs = list(docs_dir.glob("*.pdf")) if docs_dir.exists() else []
-checks.append(("PDF documents exist", len(pdfs) >= 5))
+num_pdfs = sum(1 for name in scan("data/docs") if name.endswith(".pdf"))
+checks.append(("PDF documents exist", num_pdfs >= 5))
 
 # Check 6: Frontend exists
-ui_dir = Path("ui")
-checks.append(("Frontend directory exists", ui_dir.exists()))
+checks.append(("Frontend directory exists", "ui" in root_entries))
 
 # Check 7: RAG engine exists
 rag_engine = Path("src/rag_engine.py")